@@ -1,6 +1,17 @@
+from core.cache import get_cache_version
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Exists, OuterRef, Value, When
 from django_filters import rest_framework as filters
-from recipes.models import Recipe
-from rest_framework.filters import SearchFilter
+from recipes.models import Recipe, Tag
+from rest_framework.filters import BaseFilterBackend
+
+
+def get_tag_ids_by_slug():
+    return cache.get_or_set(
+        f'tags:ids_by_slug:{get_cache_version(Tag)}',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        timeout=None
+    )
 
 
 class RecipeFilter(filters.FilterSet):
@@ -18,7 +29,15 @@ class RecipeFilter(filters.FilterSet):
         tag_slugs = self.request.GET.getlist('tags')
         if not tag_slugs:
             return queryset
-        return queryset.filter(tags__slug__in=tag_slugs).distinct()
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        tag_ids = {
+            tag_ids_by_slug[slug] for slug in tag_slugs
+            if slug in tag_ids_by_slug
+        }
+        if not tag_ids:
+            return queryset.none()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=tag_ids)))
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -33,5 +52,17 @@ class RecipeFilter(filters.FilterSet):
         return queryset
 
 
-class IngredientsSearchFilter(SearchFilter):
+class IngredientsSearchFilter(BaseFilterBackend):
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param, '').strip()
+        if not name:
+            return queryset
+        return queryset.filter(name__icontains=name).annotate(
+            is_prefix=Case(
+                When(name__istartswith=name, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        ).order_by('-is_prefix', 'name')
@@ -1,4 +1,16 @@
+from functools import partial
+from hashlib import md5
+
+from core.cache import get_cache_version, get_cache_versions
+from core.counters import change_counter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
 from recipes.models import Recipe
 from rest_framework import mixins, status, viewsets
 from rest_framework.permissions import IsAuthenticated
@@ -11,12 +23,16 @@ class ShoppingFavoriteViewSet(
     viewsets.GenericViewSet
 ):
     permission_classes = [IsAuthenticated]
+    counter_field = None
 
     def create(self, request, **kwargs):
         recipe_id = kwargs.get('recipe_id')
         recipe = get_object_or_404(Recipe, pk=recipe_id)
-        obj, created = self.queryset.get_or_create(
-            user=request.user, recipe=recipe)
+        with transaction.atomic():
+            obj, created = self.queryset.get_or_create(
+                user=request.user, recipe=recipe)
+            if created:
+                change_counter(Recipe, recipe.pk, self.counter_field, 1)
         serializer = self.get_serializer(obj)
         if created:
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -25,14 +41,119 @@ class ShoppingFavoriteViewSet(
     def delete(self, request, **kwargs):
         recipe_id = kwargs.get('recipe_id')
         get_object_or_404(Recipe, pk=recipe_id)
-        obj = self.queryset.filter(
-            user=request.user, recipe=recipe_id)
-        if obj.exists():
-            obj.delete()
+        with transaction.atomic():
+            deleted, _ = self.queryset.filter(
+                user=request.user, recipe=recipe_id).delete()
+            if deleted:
+                change_counter(Recipe, recipe_id, self.counter_field, -1)
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class CachedResponseMixin:
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        versions = ':'.join(
+            str(get_cache_version(model)) for model in self.cache_models)
+        query = sorted(request.query_params.lists())
+        key = (f'{request.path}:{query}:'
+               f'{request.accepted_renderer.format}:{versions}')
+        return md5(key.encode()).hexdigest()
+
+    def patch_response_headers(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+        return response
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        etag = f'"{key}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self.patch_response_headers(not_modified, etag)
+        data = cache.get(f'response:{key}')
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(f'response:{key}', data,
+                      settings.CATALOG_CACHE_TIMEOUT)
+        return self.patch_response_headers(Response(data), etag)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalResponseMixin:
+    version_fields = ()
+    version_models = ()
+
+    def get_version_queryset(self):
+        return self.get_queryset()
+
+    def get_etag(self, versions, *extra):
+        cache_versions = get_cache_versions(*self.version_models)
+        etag = md5(repr((versions, extra, cache_versions)).encode())
+        return f'"{etag.hexdigest()}"'
+
+    def patch_validator_headers(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def get_conditional_response(self, handler, request, versions, *extra):
+        etag = self.get_etag(versions, *extra)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler()
+        return self.patch_validator_headers(response, etag)
+
+    def get_list_response(self, versions, paginated):
+        ids = [version['id'] for version in versions]
+        objects = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [objects[pk] for pk in ids if pk in objects], many=True)
+        if paginated:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_version_queryset())
+        versions = queryset.values(*self.version_fields)
+        page = self.paginate_queryset(versions)
+        paginated = page is not None
+        if not paginated:
+            page = list(versions)
+        count = getattr(self.paginator, 'count', None)
+        return self.get_conditional_response(
+            partial(self.get_list_response, page, paginated),
+            request, page, count)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            versions = list(self.get_version_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).values(*self.version_fields))
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if not versions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.get_conditional_response(
+            partial(super().retrieve, request, *args, **kwargs),
+            request, versions)
+
+
 class ListRetrieveViewSet(
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
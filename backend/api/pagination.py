@@ -1,4 +1,5 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import (CursorPagination, LimitOffsetPagination,
+                                       PageNumberPagination)
 from rest_framework.response import Response
 
 
@@ -14,3 +15,39 @@ class IngredientPagination(PageNumberPagination):
 
     def get_paginated_response(self, data):
         return Response(data)
+
+
+class RecipeCursorPagination(CursorPagination):
+    ordering = ('-pub_date', 'id')
+    page_size_query_param = 'limit'
+
+
+class SubscriptionCursorPagination(CursorPagination):
+    ordering = ('id',)
+    page_size_query_param = 'limit'
+
+
+class LimitOffsetCursorPagination(LimitOffsetPagination):
+    cursor_pagination_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(LimitOffsetCursorPagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class SubscriptionPagination(LimitOffsetCursorPagination):
+    cursor_pagination_class = SubscriptionCursorPagination
@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import JSONParser
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Размер запроса превышает допустимый.'
+    default_code = 'payload_too_large'
+
+
+class LimitedJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        if request is not None:
+            content_length = request.META.get('CONTENT_LENGTH') or 0
+            if int(content_length) > settings.JSON_MAX_BODY_SIZE:
+                raise PayloadTooLarge()
+        return super().parse(stream, media_type, parser_context)
@@ -1,25 +1,127 @@
-from core.decodeimage import Base64ImageField
+from collections import Counter
+
+from core.counters import change_counter
+from core.decodeimage import (Base64ImageField, ImageProcessingMixin,
+                              ImageRenditionsField)
+from core.images import schedule_image_processing
+from core.recipe_bulk import bulk_create_recipes
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from recipes.models import (Favorite, Ingredients, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShortLinkClick, Tag)
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ErrorDetail, ValidationError
 from rest_framework.fields import CurrentUserDefault
 from rest_framework.validators import UniqueTogetherValidator
 
 User = get_user_model()
 
 
+def get_valid_ids(values):
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def preload_recipe_relations(items):
+    tag_ids, ingredient_ids = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        tags = item.get('tags')
+        if isinstance(tags, list):
+            tag_ids |= get_valid_ids(tags)
+        ingredients = item.get('ingredients')
+        if isinstance(ingredients, list):
+            ingredient_ids |= get_valid_ids(
+                ingredient.get('id') for ingredient in ingredients
+                if isinstance(ingredient, dict))
+    return {
+        Tag: Tag.objects.in_bulk(tag_ids),
+        Ingredients: Ingredients.objects.in_bulk(ingredient_ids),
+    }
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def get_preloaded(self):
+        return self.context.get('preloaded', {}).get(self.queryset.model)
+
+    def to_pk(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        preloaded = self.get_preloaded()
+        if preloaded is None:
+            return super().to_internal_value(data)
+        obj = preloaded.get(self.to_pk(data))
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class PreloadedManyRelatedField(serializers.ManyRelatedField):
+    default_error_messages = {
+        'does_not_exist': 'Объекты не найдены: {pk_values}',
+        'duplicates': 'Значения не должны повторяться: {pk_values}',
+    }
+
+    def to_internal_value(self, data):
+        preloaded = self.child_relation.get_preloaded()
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        objects, pks, missing, errors = [], [], [], []
+        for item in data:
+            try:
+                pk = self.child_relation.to_pk(item)
+            except ValidationError as error:
+                errors.extend(error.detail)
+                continue
+            pks.append(pk)
+            if pk in preloaded:
+                objects.append(preloaded[pk])
+            elif pk not in missing:
+                missing.append(pk)
+        duplicates = sorted(
+            pk for pk, count in Counter(pks).items() if count > 1)
+        for key, values in (('does_not_exist', missing),
+                            ('duplicates', duplicates)):
+            if values:
+                errors.append(ErrorDetail(
+                    self.error_messages[key].format(
+                        pk_values=', '.join(map(str, values))),
+                    code=key))
+        if errors:
+            raise ValidationError(errors)
+        return objects
+
+
 class AuthorSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_renditions = ImageRenditionsField(source='avatar')
 
     class Meta:
         model = User
         fields = ('email', 'id', 'username',
                   'first_name', 'last_name',
-                  'is_subscribed', 'avatar')
+                  'is_subscribed', 'avatar', 'avatar_renditions')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         return (
             user.is_authenticated
@@ -40,7 +142,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = PreloadedPrimaryKeyRelatedField(
         queryset=Ingredients.objects.all(),
         source='ingredient.id'
     )
@@ -75,33 +177,68 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField(required=True, allow_null=True)
+    image_renditions = ImageRenditionsField(source='image')
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'image_renditions', 'text', 'cooking_time')
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         if user.is_authenticated:
             return obj.favorites.filter(user=user).exists()
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         if user.is_authenticated:
             return obj.shopping_carts.filter(user=user).exists()
         return False
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context['preloaded'] = preload_recipe_relations(data)
+        return super().to_internal_value(data)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context.get('request').user
+        entries = []
+        for item in validated_data:
+            ingredients = item.pop('recipeingredient_set')
+            tags = item.pop('tags')
+            entries.append((
+                Recipe(author=user, **item),
+                [tag.id for tag in tags],
+                [(ingredient['ingredient']['id'].id, ingredient['amount'])
+                 for ingredient in ingredients]
+            ))
+        recipes = bulk_create_recipes(entries)
+        for recipe in recipes:
+            schedule_image_processing(recipe, 'image')
+        return recipes
+
+
+class RecipeCreateSerializer(ImageProcessingMixin,
+                             serializers.ModelSerializer):
     ingredients = RecipeIngredientSerializer(
         many=True, source='recipeingredient_set'
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
+    tags = PreloadedManyRelatedField(
+        child_relation=PreloadedPrimaryKeyRelatedField(
+            queryset=Tag.objects.all()),
+        error_messages={
+            'does_not_exist': 'Теги не найдены: {pk_values}',
+            'duplicates': 'Теги не должны повторяться: {pk_values}',
+        }
     )
     image = Base64ImageField(required=True, allow_null=True)
 
@@ -109,36 +246,36 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('ingredients', 'tags', 'image',
                   'name', 'text', 'cooking_time')
+        list_serializer_class = RecipeListSerializer
+
+    def to_internal_value(self, data):
+        if 'preloaded' not in self.context:
+            self.context['preloaded'] = preload_recipe_relations([data])
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def get_duplicates(ids):
+        return sorted(
+            item_id for item_id, count in Counter(ids).items() if count > 1)
 
     def validate_tags(self, tags):
         if not tags:
             raise serializers.ValidationError('Не указаны теги')
-        existing_tag_ids = set(Tag.objects.values_list('id', flat=True))
-        tag_ids = []
-        for tag in tags:
-            if int(tag.id) not in existing_tag_ids:
-                raise serializers.ValidationError(
-                    f'Тег с id={tag.id} не существует')
-            if tag.id in tag_ids:
-                raise serializers.ValidationError(
-                    'Теги не должны повторяться')
-            tag_ids.append(tag.id)
         return tags
 
     def validate_ingredients(self, ingredients):
         if not ingredients:
             raise serializers.ValidationError('Ингредиенты не добавлены')
-        ingredient_ids = []
-        for ingredient in ingredients:
-            ingredient_id = ingredient['ingredient']['id']
-            amount = ingredient.get('amount')
-            if int(amount) < 1:
-                raise serializers.ValidationError(
-                    'Количество должно быть >= 1')
-            if ingredient_id in ingredient_ids:
-                raise serializers.ValidationError(
-                    'Ингредиенты не должны повторяться')
-            ingredient_ids.append(ingredient_id)
+        errors = []
+        duplicates = self.get_duplicates(
+            ingredient['ingredient']['id'].id for ingredient in ingredients)
+        if duplicates:
+            errors.append('Ингредиенты не должны повторяться: '
+                          + ', '.join(map(str, duplicates)))
+        if any(ingredient['amount'] < 1 for ingredient in ingredients):
+            errors.append('Количество должно быть >= 1')
+        if errors:
+            raise serializers.ValidationError(errors)
         return ingredients
 
     @staticmethod
@@ -153,6 +290,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(ingredients_to_create)
 
+    @transaction.atomic
     def create(self, validated_data):
         user = self.context.get('request').user
         ingredients = validated_data.pop('recipeingredient_set', None)
@@ -160,40 +298,96 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=user, **validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(recipe, ingredients)
+        change_counter(User, user.pk, 'recipes_count', 1)
         return recipe
 
+    @staticmethod
+    def update_tags(recipe, tags):
+        current_ids = {tag.id for tag in recipe.tags.all()}
+        new_ids = {tag.id for tag in tags}
+        if current_ids - new_ids:
+            recipe.tags.remove(*(current_ids - new_ids))
+        if new_ids - current_ids:
+            recipe.tags.add(*(new_ids - current_ids))
+
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        amounts = {
+            ingredient['ingredient']['id'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            row.ingredient_id: row
+            for row in recipe.recipeingredient_set.all()
+        }
+        to_delete = [
+            row.pk for ingredient_id, row in current.items()
+            if ingredient_id not in amounts
+        ]
+        to_update, to_create = [], []
+        for ingredient_id, amount in amounts.items():
+            row = current.get(ingredient_id)
+            if row is None:
+                to_create.append(RecipeIngredient(
+                    recipe=recipe, ingredient_id=ingredient_id,
+                    amount=amount))
+            elif row.amount != amount:
+                row.amount = amount
+                to_update.append(row)
+        if to_delete:
+            RecipeIngredient.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('recipeingredient_set', None)
         tags = validated_data.pop('tags', None)
-        instance = super().update(instance, validated_data)
         if not tags:
             raise ValidationError({'tags': 'Не указаны теги'})
         if not ingredients:
             raise ValidationError({'ingredients': 'Ингредиенты не добавлены'})
-        instance.tags.set(tags)
-        instance.recipeingredient_set.all().delete()
-        self.create_ingredients(instance, ingredients)
-        instance.save()
+        instance = super().update(instance, validated_data)
+        self.update_tags(instance, tags)
+        self.update_ingredients(instance, ingredients)
         return instance
 
     def to_representation(self, instance):
         request = self.context.get('request')
+        if not getattr(instance, '_prefetched_objects_cache', None):
+            prefetch_related_objects([instance], 'tags', Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ))
         return RecipeGetSerializer(
             instance, context={'request': request}).data
 
 
+class RecipeImageSerializer(ImageProcessingMixin,
+                            serializers.ModelSerializer):
+    image = Base64ImageField(required=True)
+
+    class Meta:
+        model = Recipe
+        fields = ('image',)
+
+
 class RecipeMinifiedSerializer(serializers.Serializer):
     user = serializers.HiddenField(default=CurrentUserDefault())
     name = serializers.ReadOnlyField(source='recipe.name')
     id = serializers.ReadOnlyField(source='recipe.id')
     image = serializers.ImageField(source='recipe.image', read_only=True)
+    image_renditions = ImageRenditionsField(source='recipe.image')
     cooking_time = serializers.ReadOnlyField(source='recipe.cooking_time')
 
 
 class FavoriteSerializer(RecipeMinifiedSerializer):
     class Meta:
         model = Favorite
-        fields = ('id', 'user', 'name', 'image', 'cooking_time')
+        fields = ('id', 'user', 'name', 'image', 'image_renditions',
+                  'cooking_time')
         validators = [
             UniqueTogetherValidator(
                 queryset=Favorite.objects.all(),
@@ -206,7 +400,8 @@ class FavoriteSerializer(RecipeMinifiedSerializer):
 class ShoppingCartSerializer(RecipeMinifiedSerializer):
     class Meta:
         model = ShoppingCart
-        fields = ('id', 'user', 'name', 'image', 'cooking_time')
+        fields = ('id', 'user', 'name', 'image', 'image_renditions',
+                  'cooking_time')
         validators = [
             UniqueTogetherValidator(
                 queryset=ShoppingCart.objects.all(),
@@ -216,6 +411,12 @@ class ShoppingCartSerializer(RecipeMinifiedSerializer):
         ]
 
 
+class ShortLinkClickSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShortLinkClick
+        fields = ('date', 'count')
+
+
 class ShortLinkSerializer(serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(
         view_name='recipe-detail', lookup_field='id'
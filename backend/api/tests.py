@@ -0,0 +1,230 @@
+import base64
+import shutil
+import tempfile
+import textwrap
+from io import BytesIO, StringIO
+from unittest import mock
+
+from core.cache import get_cache_versions
+from core.images import process_image
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from recipes.models import Ingredients, Recipe, RecipeIngredient, Tag
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+RECIPES_COUNT = 8
+ANONYMOUS_LIST_QUERIES = 6
+AUTHENTICATED_LIST_QUERIES = 7
+
+
+class RecipeListQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Reader', last_name='Reader', password='password')
+        authors = [
+            User.objects.create_user(
+                email=f'author{index}@example.com',
+                username=f'author{index}',
+                first_name='Author', last_name='Author', password='password')
+            for index in range(2)
+        ]
+        tags = [
+            Tag.objects.create(name=f'Тег {index}', slug=f'tag{index}')
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredients.objects.create(
+                name=f'ингредиент {index}', measurement_unit='г')
+            for index in range(5)
+        ]
+        for index in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=authors[index % len(authors)],
+                name=f'Рецепт {index}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/image.png'
+            )
+            recipe.tags.set(tags[:index % len(tags) + 1])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=index + 1)
+                for ingredient in ingredients[:index % len(ingredients) + 1]
+            ])
+        recipe.favorites.create(user=cls.user)
+        cls.user.subscriptions.create(author=authors[0])
+
+    def setUp(self):
+        get_cache_versions(Tag, Ingredients)
+        self.anonymous_client = APIClient()
+        self.authorized_client = APIClient()
+        self.authorized_client.force_authenticate(self.user)
+
+    def assert_list_queries(self, client, expected_queries):
+        for limit in (2, RECIPES_COUNT):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(expected_queries):
+                    response = client.get(
+                        '/api/recipes/', {'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list_queries(self):
+        self.assert_list_queries(
+            self.anonymous_client, ANONYMOUS_LIST_QUERIES)
+
+    def test_authenticated_list_queries(self):
+        self.assert_list_queries(
+            self.authorized_client, AUTHENTICATED_LIST_QUERIES)
+
+
+class RecipeTagsValidationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='password')
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredient = Ingredients.objects.create(
+            name='соль', measurement_unit='г')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reports_all_unknown_and_duplicate_tags(self):
+        response = self.client.post('/api/recipes/', {
+            'tags': [self.tag.id, self.tag.id, 9999, 8888],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1}],
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 1,
+            'image': None,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['tags'], [
+            'Теги не найдены: 9999, 8888',
+            f'Теги не должны повторяться: {self.tag.id}',
+        ])
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeLookupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='password')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_non_numeric_id_returns_not_found(self):
+        for url in ('/api/recipes/abc/', '/api/recipes/abc/clicks/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+
+def encode_image(image_format='PNG', size=(64, 64)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class RecipeImageUploadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Author', password='password')
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredient = Ingredients.objects.create(
+            name='соль', measurement_unit='г')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, image):
+        return self.client.post('/api/recipes/', {
+            'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1}],
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 1,
+            'image': image,
+        }, format='json')
+
+    def test_accepts_line_wrapped_base64(self):
+        encoded = base64.b64encode(encode_image()).decode()
+        response = self.create_recipe(
+            'data:image/png;base64,' + '\n'.join(textwrap.wrap(encoded, 76)))
+        self.assertEqual(response.status_code, 201)
+
+    def test_rejects_truncated_images(self):
+        for image_format in ('PNG', 'JPEG'):
+            with self.subTest(image_format=image_format):
+                content = encode_image(image_format, size=(256, 256))
+                encoded = base64.b64encode(
+                    content[:len(content) // 2]).decode()
+                response = self.create_recipe(
+                    f'data:image/{image_format.lower()};base64,{encoded}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('image', response.data)
+
+    def process_image(self, recipe_id, name):
+        with mock.patch('core.images.close_old_connections'):
+            process_image('recipes.Recipe', recipe_id, 'image', name)
+        return Recipe.objects.get(pk=recipe_id).image.name
+
+    def test_stale_saves_keep_processed_image(self):
+        encoded = base64.b64encode(encode_image()).decode()
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.create_recipe(f'data:image/png;base64,{encoded}')
+        self.assertEqual(len(callbacks), 1)
+        stale = Recipe.objects.get(pk=response.data['id'])
+        upload_name = stale.image.name
+        processed_name = self.process_image(stale.pk, upload_name)
+        self.assertNotEqual(processed_name, upload_name)
+
+        response = self.client.patch(f'/api/recipes/{stale.pk}/', {
+            'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 2}],
+            'name': 'Новое название',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Recipe.objects.get(pk=stale.pk).image.name, processed_name)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            stale.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            self.process_image(stale.pk, upload_name), processed_name)
+
+    def test_rendition_backfill_changes_etag(self):
+        encoded = base64.b64encode(encode_image()).decode()
+        with self.captureOnCommitCallbacks():
+            recipe_id = self.create_recipe(
+                f'data:image/png;base64,{encoded}').data['id']
+        url = f'/api/recipes/{recipe_id}/'
+        response = self.client.get(url)
+        self.assertIsNone(response.data['image_renditions'])
+        call_command('create_image_renditions', stdout=StringIO())
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['image_renditions'])
@@ -1,6 +1,7 @@
 from api.validators import username_by_path_me, username_by_pattern
 from core.constants import MAX_LENGTH_FIRST_NAME, MAX_LENGTH_LAST_NAME
-from core.decodeimage import Base64ImageField
+from core.decodeimage import (Base64ImageField, ImageProcessingMixin,
+                              ImageRenditionsField)
 from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from recipes.models import Recipe
@@ -12,10 +13,12 @@ User = get_user_model()
 
 
 def is_subscribed(request, obj):
-    if isinstance(obj, Subscription):
-        obj = obj.author
     if not request or not request.user.is_authenticated:
         return False
+    if isinstance(obj, Subscription):
+        if obj.user_id == request.user.id:
+            return True
+        obj = obj.author
     return Subscription.objects.filter(
         author=obj, user=request.user).exists()
 
@@ -39,11 +42,12 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
 class CustomUserSerialier(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_renditions = ImageRenditionsField(source='avatar')
 
     class Meta:
         model = User
         fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed', 'avatar')
+                  'last_name', 'is_subscribed', 'avatar', 'avatar_renditions')
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
@@ -51,10 +55,11 @@ class CustomUserSerialier(UserSerializer):
 
 
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
+    image_renditions = ImageRenditionsField(source='image')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_renditions', 'cooking_time')
 
 
 class UserSubscribeSerializer(serializers.ModelSerializer):
@@ -70,30 +75,35 @@ class UserSubscribeSerializer(serializers.ModelSerializer):
     recipes_count = serializers.SerializerMethodField()
     avatar = serializers.ImageField(
         source='author.avatar', required=True)
+    avatar_renditions = ImageRenditionsField(source='author.avatar')
 
     class Meta:
         model = Subscription
         fields = ('email', 'id', 'username', 'first_name', 'last_name',
-                  'is_subscribed', 'recipes', 'recipes_count', 'avatar')
+                  'is_subscribed', 'recipes', 'recipes_count', 'avatar',
+                  'avatar_renditions')
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         return is_subscribed(request, obj)
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj.author)
-        if recipes_limit and recipes_limit.isdigit():
-            recipes = recipes[:int(recipes_limit)]
+        recipes = getattr(obj.author, 'limited_recipes', None)
+        if recipes is None:
+            request = self.context.get('request')
+            recipes_limit = request.query_params.get('recipes_limit')
+            recipes = Recipe.objects.filter(author=obj.author)
+            if recipes_limit and recipes_limit.isdigit():
+                recipes = recipes[:int(recipes_limit)]
         return RecipeMinifiedSerializer(
             recipes, many=True, context=self.context).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
 
-class UserAvatarSerializer(serializers.ModelSerializer):
+class UserAvatarSerializer(ImageProcessingMixin,
+                           serializers.ModelSerializer):
     user = serializers.HiddenField(default=CurrentUserDefault())
     avatar = Base64ImageField(required=False, allow_null=True)
 
@@ -1,7 +1,12 @@
+from api.pagination import SubscriptionPagination
 from core.constants import URL_PATH_AVATAR, URL_PATH_ME
+from core.counters import change_counter
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
+from recipes.models import Recipe
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
@@ -43,7 +48,8 @@ class CustomUserViewSet(UserViewSet):
         if not user.is_authenticated:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
         if request.method == 'DELETE':
-            user.avatar.delete()
+            user.avatar = None
+            user.save(update_fields=['avatar'])
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = UserAvatarSerializer(
             user,
@@ -63,10 +69,20 @@ class UserSubscribeViewSet(viewsets.ModelViewSet):
     serializer_class = UserSubscribeSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post', 'delete']
-    pagination_class = LimitOffsetPagination
+    pagination_class = SubscriptionPagination
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time', 'author')
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes[:int(recipes_limit)]
+        return self.queryset.filter(
+            user=self.request.user
+        ).select_related('author').prefetch_related(
+            Prefetch('author__recipes', queryset=recipes,
+                     to_attr='limited_recipes')
+        )
 
     @staticmethod
     def get_subscribe(request, kwargs):
@@ -84,8 +100,10 @@ class UserSubscribeViewSet(viewsets.ModelViewSet):
         if subscribe:
             return Response({'errors': 'Уже подписан'}, status=400)
 
-        subscription = Subscription.objects.create(
-            author=author, user=request.user)
+        with transaction.atomic():
+            subscription = Subscription.objects.create(
+                author=author, user=request.user)
+            change_counter(User, author.pk, 'subscribers_count', 1)
         serializer = self.get_serializer(
             subscription, context=self.get_serializer_context()
         )
@@ -93,7 +111,10 @@ class UserSubscribeViewSet(viewsets.ModelViewSet):
 
     def delete(self, request, **kwargs):
         author, subscribe = self.get_subscribe(request, kwargs)
-        deleted, _ = subscribe.delete()
+        with transaction.atomic():
+            deleted, _ = subscribe.delete()
+            if deleted:
+                change_counter(User, author.pk, 'subscribers_count', -1)
         return Response(status=(
                 status.HTTP_204_NO_CONTENT
                 if deleted else
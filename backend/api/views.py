@@ -1,54 +1,109 @@
-from core.constants import URL_PATH_DOWNLOAD_SHOPPING_CART
+from datetime import timedelta
+
+from core.constants import (RECIPE_BATCH_MAX_SIZE, SHORT_LINK_CLICKS_DAYS,
+                            URL_PATH_BATCH, URL_PATH_CLICKS,
+                            URL_PATH_DOWNLOAD_SHOPPING_CART, URL_PATH_IMAGE,
+                            URL_PATH_POPULAR)
+from core.counters import change_counter
+from core.ingredient_index import ingredient_index
 from core.shopping_list import generate_shopping_list
+from core.short_link_clicks import click_buffer
+from core.short_links import short_link_resolver
 from django.conf import settings
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from recipes.models import Favorite, Ingredients, Recipe, ShoppingCart, Tag
 from rest_framework import status, views, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from .filters import IngredientsSearchFilter, RecipeFilter
-from .mixins import ListRetrieveViewSet, ShoppingFavoriteViewSet
-from .pagination import IngredientPagination, TagPagination
-from .permissions import IsAuthorOrReadOnly
+from .mixins import (CachedResponseMixin, ConditionalResponseMixin,
+                     ListRetrieveViewSet, ShoppingFavoriteViewSet)
+from .pagination import IngredientPagination, RecipePagination, TagPagination
+from .permissions import IsAuthor, IsAuthorOrReadOnly
+from .renderers import CSVRenderer, PlainTextRenderer
 from .serializers import (FavoriteSerializer, IngredientSerializer,
                           RecipeCreateSerializer, RecipeGetSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+                          RecipeImageSerializer, ShoppingCartSerializer,
+                          ShortLinkClickSerializer, TagSerializer)
 
+User = get_user_model()
 
-class TagViewSet(ListRetrieveViewSet):
+
+class TagViewSet(CachedResponseMixin, ListRetrieveViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     http_method_names = ['get']
     permission_classes = [AllowAny]
     pagination_class = TagPagination
+    cache_models = (Tag,)
 
 
-class IngredientViewSet(ListRetrieveViewSet):
+class IngredientViewSet(CachedResponseMixin, ListRetrieveViewSet):
     queryset = Ingredients.objects.all()
     serializer_class = IngredientSerializer
     http_method_names = ['get']
     permission_classes = [AllowAny]
     pagination_class = IngredientPagination
     filter_backends = (IngredientsSearchFilter,)
-    search_fields = ('^name', 'name')
+    cache_models = (Ingredients,)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.search_ingredients, request, *args, **kwargs)
+
+    def search_ingredients(self, request, *args, **kwargs):
+        ingredients = ingredient_index.search(request.query_params.get(
+            IngredientsSearchFilter.search_param, ''))
+        page = self.paginate_queryset(ingredients)
+        return self.get_paginated_response(page)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [
         IsAuthorOrReadOnly,
         IsAuthenticatedOrReadOnly
     ]
     http_method_names = ['get', 'post', 'delete', 'patch']
-    pagination_class = LimitOffsetPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    version_models = (Tag, Ingredients)
+
+    @property
+    def version_fields(self):
+        fields = ('id', 'pub_date', 'updated_at', 'author__email',
+                  'author__username', 'author__first_name',
+                  'author__last_name', 'author__avatar')
+        if self.request.user.is_authenticated:
+            fields += ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+        return fields
+
+    def get_queryset(self):
+        if self.action == 'clicks':
+            return self.queryset.only('id', 'author_id')
+        return self.queryset.with_related().with_user_flags(self.request.user)
+
+    def get_version_queryset(self):
+        return self.queryset.with_version_fields(self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        author_id = instance.author_id
+        instance.delete()
+        change_counter(User, author_id, 'recipes_count', -1)
 
     def get_serializer_class(self):
         if self.action in ['create', 'partial_update']:
@@ -58,37 +113,103 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['GET'],
             detail=False,
             url_path=URL_PATH_DOWNLOAD_SHOPPING_CART,
-            permission_classes=(IsAuthenticated,))
+            permission_classes=(IsAuthenticated,),
+            renderer_classes=(PlainTextRenderer, CSVRenderer, JSONRenderer))
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping_cart = ShoppingCart.objects.filter(
-            user=user).select_related('recipe')
-        shopping_list = generate_shopping_list(shopping_cart)
-        response = HttpResponse(shopping_list,
-                                content_type="text/plain; charset=utf-8")
-        response['Content-Disposition'] = 'attachment; \
-            filename="shopping_list.txt"'
+        renderer = request.accepted_renderer
+        shopping_list = generate_shopping_list(request.user, renderer.format)
+        response = StreamingHttpResponse(
+            shopping_list,
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"')
         return response
 
+    @action(methods=['POST'],
+            detail=False,
+            url_path=URL_PATH_BATCH,
+            permission_classes=(IsAuthenticated,))
+    def batch(self, request):
+        serializer = RecipeCreateSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=RECIPE_BATCH_MAX_SIZE,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save()
+        queryset = self.get_queryset().filter(
+            pk__in=[recipe.pk for recipe in recipes]).order_by('id')
+        return Response(
+            RecipeGetSerializer(
+                queryset, many=True, context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(methods=['GET'], detail=False, url_path=URL_PATH_POPULAR)
+    def popular(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            popularity__isnull=False
+        ).order_by('-popularity__score', '-id')
+        paginator = LimitOffsetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['PATCH'],
+            detail=True,
+            url_path=URL_PATH_IMAGE,
+            parser_classes=(MultiPartParser,))
+    def image(self, request, pk=None):
+        serializer = RecipeImageSerializer(
+            self.get_object(),
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(methods=['GET'],
+            detail=True,
+            url_path=URL_PATH_CLICKS,
+            permission_classes=(IsAuthenticated, IsAuthor))
+    def clicks(self, request, pk=None):
+        recipe = self.get_object()
+        since = timezone.localdate() - timedelta(
+            days=SHORT_LINK_CLICKS_DAYS - 1)
+        clicks = recipe.short_link_clicks.all()
+        total = clicks.aggregate(total=Sum('count'))['total'] or 0
+        serializer = ShortLinkClickSerializer(
+            clicks.filter(date__gte=since), many=True)
+        return Response({'total': total, 'days': serializer.data})
+
 
 class FavoriteViewSet(ShoppingFavoriteViewSet):
     queryset = Favorite.objects.all()
     serializer_class = FavoriteSerializer
     permission_classes = [IsAuthenticated]
+    counter_field = 'favorites_count'
 
 
 class ShoppingCartViewSet(ShoppingFavoriteViewSet):
     queryset = ShoppingCart.objects.all()
     serializer_class = ShoppingCartSerializer
     permission_classes = [IsAuthenticated]
+    counter_field = 'shopping_carts_count'
 
 
 class ShortLinkView(views.APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, recipe_id):
-        recipe = get_object_or_404(Recipe, pk=recipe_id)
-        short_link = f'{settings.SITE_URL}/s/{recipe.short_url}'
+        short_url = short_link_resolver.get_short_url(recipe_id)
+        if short_url is None:
+            raise Http404
+        short_link = f'{settings.SITE_URL}/s/{short_url}'
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
 
 
@@ -96,5 +217,8 @@ class RedirectShortLinkView(views.APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, short_url):
-        recipe = get_object_or_404(Recipe, short_url=short_url)
-        return redirect(f'{settings.SITE_URL}/recipes/{recipe.id}')
+        recipe_id = short_link_resolver.get_recipe_id(short_url)
+        if recipe_id is None:
+            raise Http404
+        click_buffer.add(recipe_id)
+        return redirect(f'{settings.SITE_URL}/recipes/{recipe_id}')
@@ -0,0 +1,36 @@
+import time
+
+from django.apps import apps
+
+
+def get_cache_version_name(model):
+    return model._meta.label_lower
+
+
+def get_cache_version(model):
+    CacheVersion = apps.get_model('core', 'CacheVersion')
+    version, _ = CacheVersion.objects.get_or_create(
+        name=get_cache_version_name(model),
+        defaults={'version': time.time_ns()}
+    )
+    return version.version
+
+
+def bump_cache_version(model):
+    CacheVersion = apps.get_model('core', 'CacheVersion')
+    CacheVersion.objects.update_or_create(
+        name=get_cache_version_name(model),
+        defaults={'version': time.time_ns()}
+    )
+
+
+def get_cache_versions(*models):
+    CacheVersion = apps.get_model('core', 'CacheVersion')
+    versions = dict(CacheVersion.objects.filter(
+        name__in=[get_cache_version_name(model) for model in models]
+    ).values_list('name', 'version'))
+    return tuple(
+        versions.get(get_cache_version_name(model))
+        or get_cache_version(model)
+        for model in models
+    )
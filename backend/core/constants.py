@@ -10,6 +10,41 @@ MAX_LENGTH_FIRST_NAME = 150
 MAX_LENGTH_LAST_NAME = 150
 
 MIN_COOKING_TIME = 1
+MAX_INTEGER = 2147483647
+
+SHORT_URL_ALPHABET = (
+    '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+SHORT_URL_LENGTH = 7
+SHORT_URL_PERMUTATION_BITS = 40
+SHORT_URL_PERMUTATION_ROUNDS = 4
+SHORT_LINK_CLICKS_DAYS = 30
+SHORT_LINK_CLICKS_BATCH_SIZE = 1000
+
+POPULARITY_WINDOW_DAYS = 7
+POPULARITY_HALF_LIFE_DAYS = 2
+POPULARITY_FAVORITE_WEIGHT = 2
+POPULARITY_SHOPPING_CART_WEIGHT = 1
+POPULARITY_BATCH_SIZE = 1000
+
+IMPORT_READ_SIZE = 64 * 1024
+IMPORT_BATCH_SIZE = 5000
+RECIPE_BATCH_SIZE = 1000
+RECIPE_BATCH_MAX_SIZE = 50
+
+IMAGE_DECODE_CHUNK_SIZE = 4 * 64 * 1024
+IMAGE_RENDITION_SIZES = (
+    ('thumbnail', 160),
+    ('card', 480),
+    ('full', 1200),
+)
+IMAGE_RENDITION_FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpeg', 'JPEG'),
+)
+MEDIA_FIELDS = (
+    ('recipes.Recipe', 'image'),
+    ('users.User', 'avatar'),
+)
 
 PATTERN_VALID_USERNAME = r'^[\w.@+-]+\Z'
 PATTERN_TAG_SLUG = r'^[-a-zA-Z0-9_]+$'
@@ -18,3 +53,7 @@ URL_PATH_ME = 'me'
 URL_PATH_AVATAR = 'me/avatar'
 URL_PATH_FAVORITE = 'favorite'
 URL_PATH_DOWNLOAD_SHOPPING_CART = 'download_shopping_cart'
+URL_PATH_POPULAR = 'popular'
+URL_PATH_IMAGE = 'image'
+URL_PATH_CLICKS = 'clicks'
+URL_PATH_BATCH = 'batch'
@@ -0,0 +1,35 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'recipes', 'Favorite', 'recipe'),
+    ('recipes', 'Recipe', 'shopping_carts_count',
+     'recipes', 'ShoppingCart', 'recipe'),
+    ('users', 'User', 'recipes_count', 'recipes', 'Recipe', 'author'),
+    ('users', 'User', 'subscribers_count',
+     'users', 'Subscription', 'author'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))})
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), Value(0))
+
+
+def rebuild_counters(apps):
+    for (app_label, model_name, counter_field,
+         related_app_label, related_model_name, related_field) in COUNTERS:
+        model = apps.get_model(app_label, model_name)
+        related_model = apps.get_model(related_app_label, related_model_name)
+        model.objects.update(
+            **{counter_field: count_related(related_model, related_field)})
@@ -1,23 +1,108 @@
 import base64
-from io import BytesIO
+import binascii
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from core.constants import IMAGE_DECODE_CHUNK_SIZE
+from core.images import get_rendition_names, has_renditions
+from django.conf import settings
+from django.core.files import File
 from PIL import Image
 from rest_framework import serializers
+from rest_framework.serializers import raise_errors_on_nested_writes
+
+
+def decode_base64(data):
+    file = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    remainder = ''
+    for start in range(0, len(data), IMAGE_DECODE_CHUNK_SIZE):
+        chunk = remainder + ''.join(
+            data[start:start + IMAGE_DECODE_CHUNK_SIZE].split())
+        end = len(chunk) // 4 * 4
+        file.write(base64.b64decode(chunk[:end], validate=True))
+        remainder = chunk[end:]
+    if remainder:
+        file.write(base64.b64decode(remainder, validate=True))
+    file.seek(0)
+    return File(file)
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'invalid_image': 'Невалидный формат изображения.',
+        'max_size': 'Размер изображения не должен превышать {max_size} байт.',
+        'max_pixels': (
+            'Изображение не должно содержать больше {max_pixels} пикселей.'),
+    }
+
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
+        decoded = isinstance(data, str) and data.startswith('data:image')
+        if decoded:
+            _, _, imgstr = data.partition(';base64,')
+            if len(imgstr) // 4 * 3 > settings.IMAGE_MAX_UPLOAD_SIZE:
+                self.fail('max_size', max_size=settings.IMAGE_MAX_UPLOAD_SIZE)
             try:
-                format, imgstr = data.split(';base64,')
-                ext = format.split('/')[-1]
-                img_bytes = base64.b64decode(imgstr)
-                image = Image.open(BytesIO(img_bytes))
-                image.verify()
-                file = ContentFile(img_bytes, name='temp.' + ext)
-                return super().to_internal_value(file)
-            except Exception:
-                raise serializers.ValidationError(
-                    'Невалидный формат изображения.')
-        return super().to_internal_value(data)
+                data = decode_base64(imgstr)
+            except (binascii.Error, ValueError):
+                self.fail('invalid_image')
+        if not hasattr(data, 'read'):
+            return super().to_internal_value(data)
+        if data.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            self.fail('max_size', max_size=settings.IMAGE_MAX_UPLOAD_SIZE)
+        try:
+            image = Image.open(data)
+            image_format = image.format
+            width, height = image.size
+        except Exception:
+            self.fail('invalid_image')
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            self.fail('max_pixels', max_pixels=settings.IMAGE_MAX_PIXELS)
+        try:
+            image.verify()
+            data.seek(0)
+            image = Image.open(data)
+            # Для JPEG декодируем в уменьшенном масштабе: обрезанный файл
+            # всё равно обнаружится, а пиксели целиком в памяти не нужны.
+            image.draft(image.mode, (width // 8, height // 8))
+            image.load()
+        except Exception:
+            self.fail('invalid_image')
+        data.seek(0)
+        if decoded:
+            data.name = f'temp.{image_format.lower()}'
+        return serializers.FileField.to_internal_value(self, data)
+
+
+class ImageRenditionsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not has_renditions(value.storage, value.name):
+            return None
+        request = self.context.get('request')
+        return {
+            size: {
+                extension: request.build_absolute_uri(value.storage.url(name))
+                for extension, name in names.items()
+            }
+            for size, names in get_rendition_names(value.name).items()
+        }
+
+
+class ImageProcessingMixin:
+    # Сохраняем только переданные поля: полная запись строки вернула бы
+    # исходное имя картинки поверх уже обработанного файла. Обработку
+    # новых картинок запускает сигнал core.signals.
+    def update(self, instance, validated_data):
+        raise_errors_on_nested_writes('update', self, validated_data)
+        update_fields = [
+            field.name for field in instance._meta.concrete_fields
+            if field.name in validated_data or getattr(
+                field, 'auto_now', False)
+        ]
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=update_fields)
+        return instance
@@ -0,0 +1,103 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from core.constants import IMAGE_RENDITION_FORMATS, IMAGE_RENDITION_SIZES
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix='image-processing'
+)
+
+
+def reencode_image(file):
+    image = Image.open(file)
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(
+        (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION))
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, optimize=True,
+               quality=settings.IMAGE_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def get_rendition_name(name, size, extension):
+    return f'{name}.{size}.{extension}'
+
+
+def get_rendition_names(name):
+    return {
+        size: {
+            extension: get_rendition_name(name, size, extension)
+            for extension, _ in IMAGE_RENDITION_FORMATS
+        }
+        for size, _ in IMAGE_RENDITION_SIZES
+    }
+
+
+def has_renditions(storage, name):
+    size, _ = IMAGE_RENDITION_SIZES[-1]
+    extension, _ = IMAGE_RENDITION_FORMATS[-1]
+    return storage.exists(get_rendition_name(name, size, extension))
+
+
+def flatten_image(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def create_renditions(storage, name):
+    with storage.open(name) as file:
+        image = flatten_image(Image.open(file))
+    for size, dimension in IMAGE_RENDITION_SIZES:
+        rendition = image.copy()
+        rendition.thumbnail((dimension, dimension))
+        for extension, image_format in IMAGE_RENDITION_FORMATS:
+            buffer = BytesIO()
+            rendition.save(buffer, format=image_format,
+                           quality=settings.IMAGE_JPEG_QUALITY)
+            rendition_name = get_rendition_name(name, size, extension)
+            storage.overwrite(
+                rendition_name, ContentFile(buffer.getvalue()))
+
+
+def process_image(model_label, pk, field_name, name):
+    close_old_connections()
+    try:
+        model = apps.get_model(model_label)
+        storage = model._meta.get_field(field_name).storage
+        with storage.open(name) as file:
+            content = reencode_image(file)
+        new_name = storage.save(name, ContentFile(content))
+        create_renditions(storage, new_name)
+        changes = {field_name: new_name}
+        if any(field.name == 'updated_at' for field in model._meta.fields):
+            changes['updated_at'] = timezone.now()
+        model.objects.filter(pk=pk, **{field_name: name}).update(**changes)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_processing(instance, field_name):
+    name = getattr(instance, field_name).name
+    if not name:
+        return
+    transaction.on_commit(lambda: executor.submit(
+        process_image, instance._meta.label, instance.pk, field_name, name))
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import re
+from itertools import islice
+
+from core.constants import IMPORT_READ_SIZE
+from django.db import connection, transaction
+from recipes.models import Ingredients
+
+JSON_WHITESPACE = re.compile(r'\s*')
+(JSON_ARRAY_START, JSON_FIRST_ITEM, JSON_ITEM,
+ JSON_SEPARATOR, JSON_END) = range(5)
+
+
+def get_ingredient_row(item):
+    if not isinstance(item, dict):
+        raise ValueError("JSON должен содержать список объектов")
+    return item['name'], item['measurement_unit']
+
+
+def iter_json_ingredients(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    expected = JSON_ARRAY_START
+    while True:
+        position = JSON_WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if expected == JSON_END:
+                raise ValueError("Лишние данные после списка ингредиентов")
+            if expected == JSON_ARRAY_START:
+                if char != '[':
+                    raise ValueError("JSON должен содержать список объектов")
+                expected = JSON_FIRST_ITEM
+                position += 1
+                continue
+            if char == ']' and expected in (JSON_FIRST_ITEM, JSON_SEPARATOR):
+                expected = JSON_END
+                position += 1
+                continue
+            if expected == JSON_SEPARATOR:
+                if char != ',':
+                    raise ValueError(
+                        "Некорректный JSON: элементы списка должны "
+                        "разделяться одной запятой")
+                expected = JSON_ITEM
+                position += 1
+                continue
+            if char in ',]':
+                raise ValueError(
+                    "Некорректный JSON: лишняя запятая в списке")
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                pass
+            else:
+                yield get_ingredient_row(item)
+                expected = JSON_SEPARATOR
+                continue
+        chunk = file.read(IMPORT_READ_SIZE)
+        if not chunk:
+            if expected == JSON_END:
+                return
+            raise ValueError("Некорректный или незавершённый JSON")
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_csv_ingredients(file):
+    for row in csv.reader(file):
+        if not row:
+            continue
+        name, measurement_unit = row
+        yield name, measurement_unit
+
+
+INGREDIENT_READERS = {
+    'json': iter_json_ingredients,
+    'csv': iter_csv_ingredients,
+}
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def import_ingredients(rows, batch_size):
+    inserted = skipped = 0
+    for batch in iter_batches(rows, batch_size):
+        new_rows = set(batch)
+        with transaction.atomic():
+            new_rows -= set(Ingredients.objects.filter(
+                name__in={name for name, _ in new_rows}
+            ).values_list('name', 'measurement_unit'))
+            Ingredients.objects.bulk_create(
+                [Ingredients(name=name, measurement_unit=measurement_unit)
+                 for name, measurement_unit in new_rows],
+                ignore_conflicts=True
+            )
+        inserted += len(new_rows)
+        skipped += len(batch) - len(new_rows)
+    return inserted, skipped
+
+
+def copy_ingredients(rows, batch_size):
+    table = connection.ops.quote_name(Ingredients._meta.db_table)
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredients_staging '
+            '(name text, measurement_unit text) ON COMMIT DROP')
+        for batch in iter_batches(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(
+                'COPY ingredients_staging (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)', buffer)
+            total += len(batch)
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            'SELECT DISTINCT name, measurement_unit FROM ingredients_staging '
+            'ON CONFLICT (name, measurement_unit) DO NOTHING')
+        inserted = cursor.rowcount
+    return inserted, total - inserted
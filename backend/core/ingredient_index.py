@@ -0,0 +1,60 @@
+import threading
+from bisect import bisect_left
+
+from core.cache import get_cache_version
+from recipes.models import Ingredients
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+
+    def _build(self):
+        rows = Ingredients.objects.order_by('name', 'id').values_list(
+            'id', 'name', 'measurement_unit')
+        entries = sorted(
+            (name.upper(), position, name, pk, measurement_unit)
+            for position, (pk, name, measurement_unit) in enumerate(rows)
+        )
+        keys = [entry[0] for entry in entries]
+        return keys, entries
+
+    def _get_snapshot(self):
+        version = get_cache_version(Ingredients)
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._snapshot = self._build()
+                    self._version = version
+        return self._snapshot
+
+    @staticmethod
+    def _sort_by_name(entries):
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def search(self, name):
+        keys, entries = self._get_snapshot()
+        query = name.strip().upper()
+        if not query:
+            matches = self._sort_by_name(entries)
+        else:
+            start = bisect_left(keys, query)
+            end = start
+            while end < len(keys) and keys[end].startswith(query):
+                end += 1
+            prefix_matches = entries[start:end]
+            other_matches = [
+                entry for entry in entries[:start] + entries[end:]
+                if query in entry[0]
+            ]
+            matches = (self._sort_by_name(prefix_matches)
+                       + self._sort_by_name(other_matches))
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, _, name, pk, measurement_unit in matches
+        ]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,65 @@
+import os
+from datetime import timedelta
+
+from core.constants import MEDIA_FIELDS
+from core.images import get_rendition_names
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Удаляет медиафайлы, на которые не ссылается ни одна запись"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age-hours', type=int, default=24,
+            help="Не трогать файлы моложе указанного числа часов")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Только показать, какие файлы будут удалены")
+
+    def get_referenced_names(self):
+        referenced = set()
+        for model_label, field_name in MEDIA_FIELDS:
+            names = apps.get_model(model_label).objects.exclude(
+                **{field_name: ''}
+            ).exclude(
+                **{f'{field_name}__isnull': True}
+            ).values_list(field_name, flat=True).iterator()
+            for name in names:
+                referenced.add(name)
+                for renditions in get_rendition_names(name).values():
+                    referenced.update(renditions.values())
+        return referenced
+
+    def iter_stored_names(self, directory):
+        directories, files = default_storage.listdir(directory)
+        for filename in files:
+            yield os.path.join(directory, filename)
+        for subdirectory in directories:
+            yield from self.iter_stored_names(
+                os.path.join(directory, subdirectory))
+
+    def handle(self, *args, **options):
+        referenced = self.get_referenced_names()
+        threshold = timezone.now() - timedelta(hours=options['min_age_hours'])
+        removed = 0
+        for model_label, field_name in MEDIA_FIELDS:
+            model = apps.get_model(model_label)
+            directory = model._meta.get_field(field_name).upload_to.strip('/')
+            if not default_storage.exists(directory):
+                continue
+            for name in self.iter_stored_names(directory):
+                if name in referenced:
+                    continue
+                if default_storage.get_modified_time(name) > threshold:
+                    continue
+                if not options['dry_run']:
+                    default_storage.delete(name)
+                self.stdout.write(name)
+                removed += 1
+        message = ("Будет удалено" if options['dry_run'] else "Удалено")
+        self.stdout.write(self.style.SUCCESS(
+            f"{message} неиспользуемых файлов: {removed}"))
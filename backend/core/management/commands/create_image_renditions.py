@@ -0,0 +1,47 @@
+from core.constants import MEDIA_FIELDS
+from core.images import create_renditions, has_renditions
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# ETag рецептов не видит появления вариантов, поэтому обновляем updated_at
+# рецептов, в ответах которых есть это изображение.
+RECIPE_LOOKUPS = {
+    'recipes.Recipe': 'image',
+    'users.User': 'author__avatar',
+}
+
+
+class Command(BaseCommand):
+    help = "Создаёт недостающие варианты изображений рецептов и аватаров"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Пересоздать варианты даже если они уже есть")
+
+    def handle(self, *args, **options):
+        created = failed = 0
+        recipes = apps.get_model('recipes', 'Recipe').objects
+        for model_label, field_name in MEDIA_FIELDS:
+            model = apps.get_model(model_label)
+            storage = model._meta.get_field(field_name).storage
+            names = model.objects.exclude(
+                **{field_name: ''}
+            ).exclude(
+                **{f'{field_name}__isnull': True}
+            ).order_by().values_list(field_name, flat=True).distinct()
+            for name in names.iterator():
+                if not options['force'] and has_renditions(storage, name):
+                    continue
+                try:
+                    create_renditions(storage, name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"{name}: {e}"))
+                    continue
+                recipes.filter(**{RECIPE_LOOKUPS[model_label]: name}).update(
+                    updated_at=timezone.now())
+                created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Созданы варианты для {created} изображений, ошибок: {failed}"))
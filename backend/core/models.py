@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class CacheVersion(models.Model):
+    name = models.CharField(
+        verbose_name='Модель',
+        max_length=100,
+        primary_key=True
+    )
+    version = models.BigIntegerField(verbose_name='Версия')
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэша'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
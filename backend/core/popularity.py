@@ -0,0 +1,64 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from core.constants import (POPULARITY_BATCH_SIZE, POPULARITY_FAVORITE_WEIGHT,
+                            POPULARITY_HALF_LIFE_DAYS,
+                            POPULARITY_SHOPPING_CART_WEIGHT,
+                            POPULARITY_WINDOW_DAYS)
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from recipes.models import Favorite, RecipePopularity, ShoppingCart
+
+POPULARITY_SOURCES = (
+    (Favorite, POPULARITY_FAVORITE_WEIGHT),
+    (ShoppingCart, POPULARITY_SHOPPING_CART_WEIGHT),
+)
+
+
+def compute_popularity(now):
+    since = now - timedelta(days=POPULARITY_WINDOW_DAYS)
+    today = timezone.localdate(now)
+    scores = defaultdict(float)
+    for model, weight in POPULARITY_SOURCES:
+        daily_counts = model.objects.filter(
+            created_at__gte=since
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('recipe_id', 'day').annotate(
+            total=Count('pk')
+        ).order_by()
+        for row in daily_counts:
+            age = (today - row['day']).days
+            decay = 0.5 ** (age / POPULARITY_HALF_LIFE_DAYS)
+            scores[row['recipe_id']] += weight * row['total'] * decay
+    return scores
+
+
+def refresh_popularity(now=None):
+    scores = compute_popularity(now or timezone.now())
+    current = dict(RecipePopularity.objects.values_list('recipe_id', 'score'))
+    stale_ids = list(current.keys() - scores.keys())
+    scores = {
+        recipe_id: score for recipe_id, score in scores.items()
+        if recipe_id not in current
+        or not math.isclose(current[recipe_id], score)
+    }
+    with transaction.atomic():
+        for start in range(0, len(stale_ids), POPULARITY_BATCH_SIZE):
+            RecipePopularity.objects.filter(
+                recipe_id__in=stale_ids[start:start + POPULARITY_BATCH_SIZE]
+            ).delete()
+        RecipePopularity.objects.bulk_create(
+            [
+                RecipePopularity(recipe_id=recipe_id, score=score)
+                for recipe_id, score in scores.items()
+            ],
+            batch_size=POPULARITY_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=['score', 'updated_at']
+        )
+    return len(scores), len(stale_ids)
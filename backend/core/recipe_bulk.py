@@ -0,0 +1,40 @@
+from collections import Counter
+
+from core.constants import RECIPE_BATCH_SIZE
+from core.counters import change_counter
+from core.short_links import encode_short_url
+from django.contrib.auth import get_user_model
+from recipes.models import Recipe, RecipeIngredient
+
+User = get_user_model()
+
+
+def bulk_create_recipes(entries, batch_size=RECIPE_BATCH_SIZE):
+    recipes = Recipe.objects.bulk_create(
+        [recipe for recipe, _, _ in entries], batch_size=batch_size)
+    for recipe in recipes:
+        recipe.short_url = encode_short_url(recipe.pk)
+    Recipe.objects.bulk_update(
+        recipes, ['short_url'], batch_size=batch_size)
+    Recipe.tags.through.objects.bulk_create(
+        [
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, tag_ids, _ in entries
+            for tag_id in tag_ids
+        ],
+        batch_size=batch_size
+    )
+    RecipeIngredient.objects.bulk_create(
+        [
+            RecipeIngredient(
+                recipe_id=recipe.pk, ingredient_id=ingredient_id,
+                amount=amount)
+            for recipe, _, ingredients in entries
+            for ingredient_id, amount in ingredients
+        ],
+        batch_size=batch_size
+    )
+    authors = Counter(recipe.author_id for recipe in recipes)
+    for author_id, count in authors.items():
+        change_counter(User, author_id, 'recipes_count', count)
+    return recipes
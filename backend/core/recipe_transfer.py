@@ -0,0 +1,171 @@
+import json
+
+from core.constants import MAX_INTEGER, MAX_LENGTH_RECIPES, MIN_COOKING_TIME
+from core.ingredient_import import iter_batches
+from core.recipe_bulk import bulk_create_recipes
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.db.models import Prefetch
+from recipes.models import Ingredients, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+
+def serialize_recipe(recipe):
+    return {
+        'author': recipe.author.email,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'image': recipe.image.name,
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipeingredient_set.all()
+        ],
+    }
+
+
+def export_recipes(file, batch_size):
+    recipes = Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipeingredient_set',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        )
+    ).order_by('id')
+    exported = 0
+    for recipe in recipes.iterator(chunk_size=batch_size):
+        file.write(json.dumps(serialize_recipe(recipe), ensure_ascii=False))
+        file.write('\n')
+        exported += 1
+    return exported
+
+
+class RecipeImporter:
+    def __init__(self):
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, measurement_unit): pk
+            for pk, name, measurement_unit in Ingredients.objects.values_list(
+                'id', 'name', 'measurement_unit')
+        }
+        self.authors = {}
+
+    def load_authors(self, emails):
+        missing = set(emails) - self.authors.keys()
+        if missing:
+            self.authors.update(User.objects.filter(
+                email__in=missing).values_list('email', 'id'))
+
+    def build_entry(self, data):
+        if not isinstance(data, dict):
+            raise ValueError("Строка должна содержать JSON-объект")
+        for field in ('author', 'name', 'text', 'image'):
+            if not isinstance(data[field], str):
+                raise ValueError(f"Поле {field} должно быть строкой")
+        if not isinstance(data['tags'], list):
+            raise ValueError("Поле tags должно быть списком")
+        if not isinstance(data['ingredients'], list):
+            raise ValueError("Поле ingredients должно быть списком")
+        author_id = self.authors.get(data['author'])
+        if author_id is None:
+            raise ValueError(f"Автор {data['author']} не найден")
+        if not data['name'] or len(data['name']) > MAX_LENGTH_RECIPES:
+            raise ValueError(
+                f"Название должно содержать от 1 до {MAX_LENGTH_RECIPES} "
+                "символов")
+        if not data['image']:
+            raise ValueError("Не указана картинка")
+        if not data['tags']:
+            raise ValueError("Не указаны теги")
+        if not data['ingredients']:
+            raise ValueError("Ингредиенты не добавлены")
+        if not MIN_COOKING_TIME <= int(data['cooking_time']) <= MAX_INTEGER:
+            raise ValueError(
+                f"Время приготовления должно быть от {MIN_COOKING_TIME} "
+                f"до {MAX_INTEGER}")
+        tag_ids = set()
+        for slug in data['tags']:
+            if not isinstance(slug, str) or slug not in self.tags:
+                raise ValueError(f"Тег {slug} не найден")
+            tag_ids.add(self.tags[slug])
+        ingredients = {}
+        for item in data['ingredients']:
+            if not isinstance(item, dict):
+                raise ValueError("Ингредиент должен быть JSON-объектом")
+            key = (item['name'], item['measurement_unit'])
+            if key not in self.ingredients:
+                raise ValueError(f"Ингредиент {key[0]} ({key[1]}) не найден")
+            if self.ingredients[key] in ingredients:
+                raise ValueError("Ингредиенты не должны повторяться")
+            if not 1 <= int(item['amount']) <= MAX_INTEGER:
+                raise ValueError(
+                    f"Количество должно быть от 1 до {MAX_INTEGER}")
+            ingredients[self.ingredients[key]] = int(item['amount'])
+        recipe = Recipe(
+            author_id=author_id,
+            name=data['name'],
+            text=data['text'],
+            cooking_time=int(data['cooking_time']),
+            image=data['image'],
+        )
+        return recipe, tag_ids, ingredients.items()
+
+    def import_batch(self, lines, on_error):
+        records = []
+        for line_number, line in lines:
+            try:
+                records.append((line_number, json.loads(line)))
+            except ValueError as error:
+                on_error(line_number, f"Некорректный JSON: {error}")
+        self.load_authors(
+            data['author'] for _, data in records
+            if isinstance(data, dict) and isinstance(data.get('author'), str))
+        entries = []
+        for line_number, data in records:
+            try:
+                entries.append((line_number, self.build_entry(data)))
+            except KeyError as error:
+                on_error(line_number, f"Не указано поле {error}")
+            except (TypeError, ValueError) as error:
+                on_error(line_number, error)
+        if not entries:
+            return 0
+        try:
+            with transaction.atomic():
+                bulk_create_recipes([entry for _, entry in entries])
+            return len(entries)
+        except DatabaseError:
+            return self.import_entries(entries, on_error)
+
+    @staticmethod
+    def import_entries(entries, on_error):
+        imported = 0
+        for line_number, entry in entries:
+            recipe = entry[0]
+            recipe.pk = recipe.short_url = None
+            recipe._state.adding = True
+            try:
+                with transaction.atomic():
+                    bulk_create_recipes([entry])
+            except DatabaseError as error:
+                on_error(line_number, f"Ошибка базы данных: {error}")
+            else:
+                imported += 1
+        return imported
+
+    def import_recipes(self, file, batch_size, on_error):
+        lines = (
+            (line_number, line)
+            for line_number, line in enumerate(file, start=1)
+            if line.strip()
+        )
+        return sum(
+            self.import_batch(batch, on_error)
+            for batch in iter_batches(lines, batch_size)
+        )
@@ -1,24 +1,60 @@
-from collections import defaultdict
+import csv
+import json
 
+from django.db.models import F, Sum
 from recipes.models import RecipeIngredient
 
+SHOPPING_LIST_CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
 
-def generate_shopping_list(shopping_cart_queryset):
-    ingredients_dict = defaultdict(lambda: {'amount': 0, 'unit': ''})
 
-    for cart_item in shopping_cart_queryset:
-        recipe = cart_item.recipe
-        recipe_ingredients = RecipeIngredient.objects.filter(
-            recipe=recipe
-        ).select_related('ingredient')
+class Echo:
+    def write(self, value):
+        return value
 
-        for recipe_ingredient in recipe_ingredients:
-            ingredient = recipe_ingredient.ingredient
-            key = ingredient.name
-            ingredients_dict[key]['amount'] += recipe_ingredient.amount
-            ingredients_dict[key]['unit'] = ingredient.measurement_unit
 
-    return "\n".join(
-        f"{name} ({data['unit']}) — {data['amount']}"
-        for name, data in ingredients_dict.items()
-    )
+def get_shopping_list(user):
+    return RecipeIngredient.objects.filter(
+        recipe__shopping_carts__user=user
+    ).values(
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit')
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('name', 'measurement_unit')
+
+
+def stream_txt(ingredients):
+    for item in ingredients:
+        yield (f"{item['name']} ({item['measurement_unit']}) — "
+               f"{item['total_amount']}\n")
+
+
+def stream_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOPPING_LIST_CSV_HEADER)
+    for item in ingredients:
+        yield writer.writerow(
+            (item['name'], item['measurement_unit'], item['total_amount']))
+
+
+def stream_json(ingredients):
+    yield '['
+    for index, item in enumerate(ingredients):
+        yield (',' if index else '') + json.dumps({
+            'name': item['name'],
+            'measurement_unit': item['measurement_unit'],
+            'amount': item['total_amount'],
+        }, ensure_ascii=False)
+    yield ']'
+
+
+SHOPPING_LIST_STREAMS = {
+    'txt': stream_txt,
+    'csv': stream_csv,
+    'json': stream_json,
+}
+
+
+def generate_shopping_list(user, file_format='txt'):
+    ingredients = get_shopping_list(user).iterator()
+    return SHOPPING_LIST_STREAMS[file_format](ingredients)
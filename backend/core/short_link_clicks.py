@@ -0,0 +1,113 @@
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from core.constants import SHORT_LINK_CLICKS_BATCH_SIZE
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def save_clicks(counts):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ShortLinkClick = apps.get_model('recipes', 'ShortLinkClick')
+    recipe_ids = set(Recipe.objects.filter(
+        pk__in={recipe_id for recipe_id, _ in counts}
+    ).values_list('id', flat=True))
+    counts = {
+        key: count for key, count in counts.items() if key[0] in recipe_ids}
+    if not counts:
+        return 0
+    with transaction.atomic():
+        rows = {
+            (row.recipe_id, row.date): row
+            for row in ShortLinkClick.objects.filter(
+                recipe_id__in=recipe_ids,
+                date__in={date for _, date in counts}
+            ).only('id', 'recipe_id', 'date')
+        }
+        changed, created = [], []
+        for (recipe_id, date), count in counts.items():
+            row = rows.get((recipe_id, date))
+            if row is None:
+                created.append(ShortLinkClick(
+                    recipe_id=recipe_id, date=date, count=count))
+            else:
+                row.count = F('count') + count
+                changed.append(row)
+        ShortLinkClick.objects.bulk_update(
+            changed, ['count'], batch_size=SHORT_LINK_CLICKS_BATCH_SIZE)
+        try:
+            with transaction.atomic():
+                ShortLinkClick.objects.bulk_create(
+                    created, batch_size=SHORT_LINK_CLICKS_BATCH_SIZE)
+        except IntegrityError:
+            for row in created:
+                updated = ShortLinkClick.objects.filter(
+                    recipe_id=row.recipe_id, date=row.date
+                ).update(count=F('count') + row.count)
+                if not updated:
+                    ShortLinkClick.objects.create(
+                        recipe_id=row.recipe_id, date=row.date,
+                        count=row.count)
+    return sum(counts.values())
+
+
+class ClickBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def _start_worker(self):
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            self._counts.clear()
+        self._pid = os.getpid()
+        threading.Thread(
+            target=self._run, name='short-link-clicks', daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.SHORT_LINK_CLICKS_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def add(self, recipe_id):
+        with self._lock:
+            self._start_worker()
+            self._counts[(recipe_id, timezone.localdate())] += 1
+            pending = len(self._counts)
+        if pending >= settings.SHORT_LINK_CLICKS_FLUSH_SIZE:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        try:
+            return save_clicks(counts)
+        except Exception:
+            logger.exception(
+                'Не удалось сохранить переходы по коротким ссылкам')
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+
+
+click_buffer = ClickBuffer()
+atexit.register(click_buffer.flush)
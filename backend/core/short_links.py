@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from core.constants import (SHORT_URL_ALPHABET, SHORT_URL_LENGTH,
+                            SHORT_URL_PERMUTATION_BITS,
+                            SHORT_URL_PERMUTATION_ROUNDS)
+from django.apps import apps
+from django.conf import settings
+
+HALF_BITS = SHORT_URL_PERMUTATION_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+HALF_BYTES = (HALF_BITS + 7) // 8
+PERMUTATION_MASK = (1 << SHORT_URL_PERMUTATION_BITS) - 1
+
+
+@lru_cache(maxsize=None)
+def get_round_keys():
+    return tuple(
+        hashlib.sha256(
+            f'short-url:{index}:{settings.SHORT_URL_KEY}'.encode()
+        ).digest()[:16]
+        for index in range(SHORT_URL_PERMUTATION_ROUNDS)
+    )
+
+
+def permute(value):
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for key in get_round_keys():
+        digest = hashlib.blake2b(
+            right.to_bytes(HALF_BYTES, 'big'), key=key, digest_size=HALF_BYTES
+        ).digest()
+        left, right = right, left ^ (int.from_bytes(digest, 'big')
+                                     & HALF_MASK)
+    return (left << HALF_BITS) | right
+
+
+def encode_base62(value):
+    base = len(SHORT_URL_ALPHABET)
+    chars = []
+    while value:
+        value, remainder = divmod(value, base)
+        chars.append(SHORT_URL_ALPHABET[remainder])
+    return ''.join(reversed(chars)).rjust(
+        SHORT_URL_LENGTH, SHORT_URL_ALPHABET[0])
+
+
+def encode_short_url(pk):
+    high_bits = pk & ~PERMUTATION_MASK
+    return encode_base62(high_bits | permute(pk & PERMUTATION_MASK))
+
+
+class ShortLinkResolver:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+        self._short_urls = OrderedDict()
+
+    def _get(self, entries, key):
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def _put(self, recipe_id, short_url):
+        with self._lock:
+            for entries, key, value in (
+                (self._ids, short_url, recipe_id),
+                (self._short_urls, recipe_id, short_url),
+            ):
+                entries[key] = value
+                entries.move_to_end(key)
+                while len(entries) > settings.SHORT_LINK_CACHE_SIZE:
+                    entries.popitem(last=False)
+
+    def get_recipe_id(self, short_url):
+        recipe_id = self._get(self._ids, short_url)
+        if recipe_id is None:
+            recipe_id = apps.get_model('recipes', 'Recipe').objects.filter(
+                short_url=short_url).values_list('id', flat=True).first()
+            if recipe_id is not None:
+                self._put(recipe_id, short_url)
+        return recipe_id
+
+    def get_short_url(self, recipe_id):
+        short_url = self._get(self._short_urls, recipe_id)
+        if short_url is None:
+            short_url = apps.get_model('recipes', 'Recipe').objects.filter(
+                pk=recipe_id).values_list('short_url', flat=True).first()
+            if short_url:
+                self._put(recipe_id, short_url)
+        return short_url
+
+    def invalidate(self, recipe_id, short_url=None):
+        with self._lock:
+            cached_short_url = self._short_urls.pop(recipe_id, None)
+            for key in {short_url, cached_short_url} - {None}:
+                self._ids.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._short_urls.clear()
+
+
+short_link_resolver = ShortLinkResolver()
@@ -0,0 +1,21 @@
+from core.constants import MEDIA_FIELDS
+from core.images import has_renditions, schedule_image_processing
+from django.db.models.signals import post_save
+
+
+def schedule_unprocessed_images(sender, instance, raw=False,
+                                update_fields=None, **kwargs):
+    if raw:
+        return
+    for label, field_name in MEDIA_FIELDS:
+        if label != sender._meta.label:
+            continue
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        file = getattr(instance, field_name)
+        if file and not has_renditions(file.storage, file.name):
+            schedule_image_processing(instance, field_name)
+
+
+for label, _ in MEDIA_FIELDS:
+    post_save.connect(schedule_unprocessed_images, sender=label)
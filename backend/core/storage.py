@@ -0,0 +1,37 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        directory, filename = os.path.split(name)
+        _, extension = os.path.splitext(filename)
+        return os.path.join(
+            directory, digest.hexdigest() + extension.lower())
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            # Обновляем mtime, чтобы collect_media_garbage не удалил файл,
+            # который только что снова загрузили.
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        return super().save(name, content, max_length)
+
+    def overwrite(self, name, content):
+        self.delete(name)
+        return super().save(name, content)
@@ -1,8 +1,7 @@
 from django.contrib import admin
-from django.db.models import Count
 
 from .models import (Favorite, Ingredients, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShortLinkClick, Tag)
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -22,13 +21,9 @@ class RecipeAdmin(admin.ModelAdmin):
     filter_horizontal = ('ingredients',)
     inlines = [RecipeIngredientInline]
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(favorite_count=Count('favorites'))
-
     @admin.display(description='Добавлений в избранное')
     def favorite_count(self, obj):
-        return obj.favorite_count
+        return obj.favorites_count
 
 
 @admin.register(Tag)
@@ -50,3 +45,9 @@ class FavoriteAdmin(admin.ModelAdmin):
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+
+
+@admin.register(ShortLinkClick)
+class ShortLinkClickAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'date', 'count')
+    list_filter = ('date',)
@@ -0,0 +1,19 @@
+from core.constants import RECIPE_BATCH_SIZE
+from core.recipe_transfer import export_recipes
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в NDJSON-файл"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', type=str, help="Путь к NDJSON-файлу")
+        parser.add_argument(
+            '--batch-size', type=int, default=RECIPE_BATCH_SIZE,
+            help="Количество рецептов, читаемых из базы за один запрос")
+
+    def handle(self, *args, **options):
+        with open(options['file_path'], 'w', encoding='utf-8') as file:
+            exported = export_recipes(file, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Выгружено рецептов: {exported}"))
@@ -0,0 +1,28 @@
+from core.constants import RECIPE_BATCH_SIZE
+from core.recipe_transfer import RecipeImporter
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Загружает рецепты из NDJSON-файла"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', type=str, help="Путь к NDJSON-файлу")
+        parser.add_argument(
+            '--batch-size', type=int, default=RECIPE_BATCH_SIZE,
+            help="Количество рецептов в одной транзакции")
+
+    def handle(self, *args, **options):
+        skipped = 0
+
+        def report_error(line_number, error):
+            nonlocal skipped
+            skipped += 1
+            self.stderr.write(self.style.ERROR(
+                f"Строка {line_number}: {error}"))
+
+        with open(options['file_path'], 'r', encoding='utf-8') as file:
+            imported = RecipeImporter().import_recipes(
+                file, options['batch_size'], report_error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено рецептов: {imported}, пропущено: {skipped}"))
@@ -1,37 +1,55 @@
-import json
+import os
 
+from core.cache import bump_cache_version
+from core.constants import IMPORT_BATCH_SIZE
+from core.ingredient_import import (INGREDIENT_READERS, copy_ingredients,
+                                    import_ingredients)
 from django.core.management.base import BaseCommand
+from django.db import connection
 from recipes.models import Ingredients
 
 
 class Command(BaseCommand):
-    help = "Загружает ингредиенты из JSON-файла"
+    help = "Загружает ингредиенты из JSON- или CSV-файла"
 
     def add_arguments(self, parser):
-        parser.add_argument('file_path', type=str, help="Путь к JSON-файлу")
+        parser.add_argument(
+            'file_path', type=str, help="Путь к JSON- или CSV-файлу")
+        parser.add_argument(
+            '--format', choices=INGREDIENT_READERS,
+            help="Формат файла, по умолчанию определяется по расширению")
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help="Количество строк в одной пачке")
+        parser.add_argument(
+            '--copy', action='store_true',
+            help="Загрузить через COPY во временную таблицу (PostgreSQL)")
 
     def handle(self, *args, **options):
         file_path = options['file_path']
+        file_format = (options['format']
+                       or os.path.splitext(file_path)[1].lstrip('.').lower())
+        if file_format not in INGREDIENT_READERS:
+            self.stderr.write(self.style.ERROR(
+                "Ошибка: укажите формат файла json или csv"))
+            return
+        if options['copy'] and connection.vendor != 'postgresql':
+            self.stderr.write(self.style.ERROR(
+                "Ошибка: загрузка через COPY доступна только для PostgreSQL"))
+            return
+        load = copy_ingredients if options['copy'] else import_ingredients
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-
-            if not isinstance(data, list):
-                self.stderr.write(self.style.ERROR(
-                    "Ошибка: JSON должен содержать список объектов"))
-                return
-
-            ingredients = []
-            for item in data:
-                ingredients.append(Ingredients(
-                    name=item['name'],
-                    measurement_unit=item['measurement_unit']))
-
-            Ingredients.objects.bulk_create(
-                ingredients, ignore_conflicts=True)
-            self.stdout.write(self.style.SUCCESS(
-                f"Успешно загружено {len(ingredients)} ингредиентов"))
-
+            with open(file_path, 'r', encoding='utf-8', newline='') as file:
+                inserted, skipped = load(
+                    INGREDIENT_READERS[file_format](file),
+                    options['batch_size'])
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Ошибка при загрузке: {e}"))
+            return
+        finally:
+            bump_cache_version(Ingredients)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Добавлено ингредиентов: {inserted}, "
+            f"пропущено уже существующих: {skipped}"))
@@ -0,0 +1,13 @@
+from core.counters import rebuild_counters
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики избранного, покупок, рецептов и подписчиков"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_counters(apps)
+        self.stdout.write(self.style.SUCCESS("Счётчики пересчитаны"))
@@ -0,0 +1,11 @@
+from core.popularity import refresh_popularity
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рейтинг популярных рецептов за неделю"
+
+    def handle(self, *args, **options):
+        updated, removed = refresh_popularity()
+        self.stdout.write(self.style.SUCCESS(
+            f"Рейтинг обновлён: {updated} рецептов, удалено {removed}"))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:21
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# У существующих записей нет настоящей даты добавления. Дата далеко за
+# пределами окна популярности не даёт старому избранному попасть в рейтинг
+# текущей недели.
+BACKFILL_CREATED_AT = datetime.datetime(
+    2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipePopularity',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(db_index=True, verbose_name='Рейтинг')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=BACKFILL_CREATED_AT, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=BACKFILL_CREATED_AT, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:28
+
+from core.short_links import encode_short_url
+from django.db import migrations, models
+
+
+def fill_short_urls(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = list(Recipe.objects.filter(short_url='').only('id'))
+    for recipe in recipes:
+        recipe.short_url = encode_short_url(recipe.pk)
+    Recipe.objects.bulk_update(recipes, ['short_url'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_url',
+            field=models.CharField(blank=True, max_length=10, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_short_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_short_url_nullable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortLinkClick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Переходов')),
+                ('recipe', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='short_link_clicks', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Переходы по короткой ссылке',
+                'verbose_name_plural': 'Переходы по коротким ссылкам',
+                'ordering': ('-date',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shortlinkclick',
+            constraint=models.UniqueConstraint(fields=('recipe', 'date'), name='short_link_click_recipe_date'),
+        ),
+    ]
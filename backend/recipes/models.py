@@ -1,10 +1,12 @@
 from core.constants import (MAX_LENGTH_INGREDIENT, MAX_LENGTH_MEASUREMENT_UNIT,
                             MAX_LENGTH_RECIPES, MAX_LENGTH_SHORT_URL,
                             MAX_LENGTH_SLUG, MAX_LENGTH_TAG, MIN_COOKING_TIME)
+from core.short_links import encode_short_url
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
-from shortuuid import ShortUUID
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from users.models import Subscription
 
 User = get_user_model()
 
@@ -54,12 +56,58 @@ class Ingredients(models.Model):
         return f'{self.name} - {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.select_related('author').annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField())
+            )
+        return self.annotate(
+            **self.get_recipe_flags(user)
+        ).prefetch_related(Prefetch(
+            'author',
+            queryset=User.objects.annotate(
+                is_subscribed=Exists(Subscription.objects.filter(
+                    user=user, author=OuterRef('pk')))
+            )
+        ))
+
+    def with_version_fields(self, user):
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            **self.get_recipe_flags(user),
+            is_subscribed=Exists(Subscription.objects.filter(
+                user=user, author=OuterRef('author')))
+        )
+
+    @staticmethod
+    def get_recipe_flags(user):
+        return {
+            'is_favorited': Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            'is_in_shopping_cart': Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        }
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         verbose_name='Автор',
         to=User,
         on_delete=models.CASCADE,
-        related_name='recipes'
+        related_name='recipes',
+        db_index=False
     )
     name = models.CharField(
         verbose_name='Название',
@@ -83,23 +131,44 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         auto_now_add=True)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0)
+    shopping_carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0)
     short_url = models.CharField(
         max_length=MAX_LENGTH_SHORT_URL,
-        unique=True, blank=True
+        unique=True, blank=True, null=True
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', 'id'],
+                name='recipe_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
-        if not self.short_url:
-            self.short_url = ShortUUID().random(length=6).lower()
         super().save(*args, **kwargs)
+        if not self.short_url:
+            self.short_url = encode_short_url(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_url=self.short_url)
 
 
 class RecipeIngredient(models.Model):
@@ -141,7 +210,12 @@ class Favorite(models.Model):
         verbose_name='Рецепт',
         to=Recipe,
         related_name='favorites',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
     )
 
     class Meta:
@@ -153,6 +227,14 @@ class Favorite(models.Model):
                 fields=['user', 'recipe'],
                 name='unique_favorite')
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='favorite_recipe_user_idx'),
+            models.Index(
+                fields=['created_at', 'recipe'],
+                name='favorite_created_recipe_idx'),
+        ]
 
     def __str__(self):
         return self.recipe.name
@@ -168,7 +250,12 @@ class ShoppingCart(models.Model):
         verbose_name='Рецепт',
         to=Recipe,
         related_name='shopping_carts',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
     )
 
     class Meta:
@@ -180,6 +267,65 @@ class ShoppingCart(models.Model):
                 fields=['user', 'recipe'],
                 name='unique_shopping_cart')
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='cart_recipe_user_idx'),
+            models.Index(
+                fields=['created_at', 'recipe'],
+                name='cart_created_recipe_idx'),
+        ]
 
     def __str__(self):
         return self.recipe.name
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        verbose_name='Рецепт',
+        to=Recipe,
+        related_name='popularity',
+        primary_key=True,
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(verbose_name='Рейтинг', db_index=True)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата пересчёта',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        ordering = ('-score',)
+
+    def __str__(self):
+        return f'{self.recipe} — {self.score:.2f}'
+
+
+class ShortLinkClick(models.Model):
+    recipe = models.ForeignKey(
+        verbose_name='Рецепт',
+        to=Recipe,
+        related_name='short_link_clicks',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    date = models.DateField(verbose_name='Дата')
+    count = models.PositiveIntegerField(
+        verbose_name='Переходов',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Переходы по короткой ссылке'
+        verbose_name_plural = 'Переходы по коротким ссылкам'
+        ordering = ('-date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'date'],
+                name='short_link_click_recipe_date'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} — {self.date}: {self.count}'
@@ -0,0 +1,17 @@
+from core.cache import bump_cache_version
+from core.short_links import short_link_resolver
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredients, Recipe, Tag
+
+
+@receiver([post_save, post_delete], sender=Ingredients)
+@receiver([post_save, post_delete], sender=Tag)
+def bump_catalog_cache_version(sender, **kwargs):
+    bump_cache_version(sender)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_short_link(sender, instance, **kwargs):
+    short_link_resolver.invalidate(instance.pk, instance.short_url)
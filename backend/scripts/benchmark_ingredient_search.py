@@ -0,0 +1,114 @@
+# Замеряет задержку поиска ингредиентов для автодополнения.
+#
+# Запуск из каталога backend/:
+#     python scripts/benchmark_ingredient_search.py --runs 500
+#
+# Сравниваются три пути: SQL-фильтр IngredientsSearchFilter (на PostgreSQL
+# с trigram-индексом и без него), индекс в памяти процесса и полный
+# HTTP-запрос к /api/ingredients/. Если справочник пуст, он загружается из
+# data/ingredients.json. Все изменения в базе откатываются в конце.
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+SINGLE_LETTER_QUERIES = ('а', 'с', 'м', 'к', 'п')
+MULTI_LETTER_QUERIES = ('сол', 'морк', 'картоф', 'ик', 'масло сл')
+PAGE_SIZE = 10
+
+
+class Rollback(Exception):
+    pass
+
+
+def measure(function, queries, runs):
+    samples = []
+    for run in range(runs):
+        query = queries[run % len(queries)]
+        started = time.perf_counter()
+        function(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    percentiles = statistics.quantiles(samples, n=100)
+    return statistics.median(samples), percentiles[94], percentiles[98]
+
+
+def report(label, function, runs):
+    for group, queries in (('1 буква', SINGLE_LETTER_QUERIES),
+                           ('2+ буквы', MULTI_LETTER_QUERIES)):
+        function(queries[0])
+        p50, p95, p99 = measure(function, queries, runs)
+        print(f'{label:<32} {group:<10} p50={p50:7.3f} мс '
+              f'p95={p95:7.3f} мс p99={p99:7.3f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=500)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+
+    from api.filters import IngredientsSearchFilter
+    from core.ingredient_import import (import_ingredients,
+                                        iter_json_ingredients)
+    from core.ingredient_index import ingredient_index
+    from django.core.cache import cache
+    from django.db import connection, transaction
+    from django.test import RequestFactory
+    from django.test.utils import setup_test_environment
+    from recipes.models import Ingredients
+    from rest_framework.request import Request
+    from rest_framework.test import APIClient
+
+    setup_test_environment()
+    search_filter = IngredientsSearchFilter()
+    factory = RequestFactory()
+    client = APIClient()
+
+    def search_database(query):
+        request = Request(factory.get('/', {'name': query}))
+        list(search_filter.filter_queryset(
+            request, Ingredients.objects.all(), None)[:PAGE_SIZE])
+
+    def search_index(query):
+        ingredient_index.search(query)[:PAGE_SIZE]
+
+    def search_api(query):
+        cache.clear()
+        search_api_cached(query)
+
+    def search_api_cached(query):
+        response = client.get('/api/ingredients/', {'name': query})
+        assert response.status_code == 200, response.status_code
+
+    try:
+        with transaction.atomic():
+            if not Ingredients.objects.exists():
+                path = BASE_DIR / 'data' / 'ingredients.json'
+                with open(path, encoding='utf-8') as file:
+                    import_ingredients(iter_json_ingredients(file), 5000)
+            print(f'База: {connection.vendor}, ингредиентов: '
+                  f'{Ingredients.objects.count()}, прогонов: {args.runs}')
+            report('SQL-фильтр', search_database, args.runs)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'DROP INDEX IF EXISTS recipes_ingredients_name_trgm')
+                report('SQL-фильтр без trigram', search_database, args.runs)
+            report('Индекс в памяти', search_index, args.runs)
+            report('API без кэша ответа', search_api, args.runs)
+            report('API с кэшем ответа', search_api_cached, args.runs)
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+# Сравнивает планы и задержку фильтров списка рецептов до и после индексов
+# из миграции recipes/0006_filter_indexes.
+#
+# Запуск из каталога backend/ на PostgreSQL (переменные окружения как для
+# приложения):
+#     python scripts/benchmark_recipe_filters.py --recipes 1000000
+#
+# Скрипт засевает базу детерминированными данными (setseed), снимает
+# EXPLAIN (ANALYZE, BUFFERS) и p50/p99 для каждого фильтра на текущей схеме,
+# затем заменяет составные индексы одиночными индексами внешних ключей, как
+# было до миграции 0006, и повторяет замеры. Всё выполняется в одной
+# транзакции, которая откатывается в конце, поэтому схема и данные базы не
+# меняются. DROP INDEX блокирует таблицы до отката, так что запускайте
+# скрипт на отдельной копии базы, а не на рабочей.
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+PAGE_SIZE = 6
+SEED = 0.42
+BENCHMARK_PREFIX = 'benchmark'
+BENCHMARK_IMAGE = 'recipes/benchmark.png'
+FILTER_INDEXES = (
+    'favorite_recipe_user_idx',
+    'favorite_created_recipe_idx',
+    'recipe_pub_date_idx',
+    'recipe_author_pub_date_idx',
+    'cart_recipe_user_idx',
+    'cart_created_recipe_idx',
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(cursor, options, tables):
+    cursor.execute('SELECT setseed(%s)', [SEED])
+    cursor.execute(
+        f'''
+        INSERT INTO {tables["user"]} (
+            password, is_superuser, username, first_name, last_name, email,
+            is_staff, is_active, date_joined, recipes_count,
+            subscribers_count)
+        SELECT '!', false, 'benchmark' || g, 'Benchmark', 'Benchmark',
+               'benchmark' || g || '@example.com', false, true, now(), 0, 0
+        FROM generate_series(1, %s) AS g
+        ''',
+        [options.users]
+    )
+    cursor.execute(
+        f'''
+        INSERT INTO {tables["tag"]} (name, slug)
+        SELECT 'Бенчмарк ' || g, 'benchmark' || g
+        FROM generate_series(1, %s) AS g
+        ''',
+        [options.tags]
+    )
+    cursor.execute(
+        f'''
+        CREATE TEMPORARY TABLE benchmark_users ON COMMIT DROP AS
+        SELECT row_number() OVER (ORDER BY id) AS position, id
+        FROM {tables["user"]} WHERE username LIKE %s
+        ''',
+        [BENCHMARK_PREFIX + '%']
+    )
+    cursor.execute(
+        f'''
+        INSERT INTO {tables["recipe"]} (
+            author_id, name, image, text, cooking_time, pub_date,
+            updated_at, favorites_count, shopping_carts_count)
+        SELECT users.id, 'Рецепт ' || rows.g, %s,
+               'Описание', 1 + rows.g %% 120,
+               now() - rows.g * interval '1 minute', now(), 0, 0
+        FROM (
+            SELECT g, 1 + floor(random() * %s)::int AS user_position
+            FROM generate_series(1, %s) AS g
+        ) AS rows
+        JOIN benchmark_users AS users
+          ON users.position = rows.user_position
+        ORDER BY rows.g
+        ''',
+        [BENCHMARK_IMAGE, options.users, options.recipes]
+    )
+    cursor.execute(
+        f'''
+        CREATE TEMPORARY TABLE benchmark_recipes ON COMMIT DROP AS
+        SELECT row_number() OVER (ORDER BY id) AS position, id
+        FROM {tables["recipe"]} WHERE image = %s
+        ''',
+        [BENCHMARK_IMAGE]
+    )
+    cursor.execute(
+        f'''
+        CREATE TEMPORARY TABLE benchmark_tags ON COMMIT DROP AS
+        SELECT row_number() OVER (ORDER BY id) AS position, id
+        FROM {tables["tag"]} WHERE slug LIKE %s
+        ''',
+        [BENCHMARK_PREFIX + '%']
+    )
+    cursor.execute(
+        f'''
+        INSERT INTO {tables["recipe_tags"]} (recipe_id, tag_id)
+        SELECT pairs.recipe_id, tags.id
+        FROM (
+            SELECT recipes.id AS recipe_id,
+                   1 + floor(random() * %s)::int AS tag_position
+            FROM benchmark_recipes AS recipes
+            CROSS JOIN generate_series(1, 2)
+        ) AS pairs
+        JOIN benchmark_tags AS tags ON tags.position = pairs.tag_position
+        ON CONFLICT DO NOTHING
+        ''',
+        [options.tags]
+    )
+    for table, count in ((tables['favorite'], options.favorites),
+                         (tables['shopping_cart'], options.carts)):
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (user_id, recipe_id, created_at)
+            SELECT users.id, recipes.id,
+                   now() - random() * interval '60 days'
+            FROM (
+                SELECT 1 + floor(random() * %s)::int AS user_position,
+                       1 + floor(power(random(), 3) * %s)::int
+                           AS recipe_position
+                FROM generate_series(1, %s)
+            ) AS pairs
+            JOIN benchmark_users AS users
+              ON users.position = pairs.user_position
+            JOIN benchmark_recipes AS recipes
+              ON recipes.position = pairs.recipe_position
+            ON CONFLICT DO NOTHING
+            ''',
+            [options.users, options.recipes, count]
+        )
+    for table in tables.values():
+        cursor.execute(f'ANALYZE {table}')
+
+
+def use_legacy_indexes(cursor, tables):
+    for name in FILTER_INDEXES:
+        cursor.execute(f'DROP INDEX {name}')
+    cursor.execute(
+        f'CREATE INDEX benchmark_recipe_author ON {tables["recipe"]} '
+        '(author_id)')
+    cursor.execute(
+        f'CREATE INDEX benchmark_favorite_recipe ON {tables["favorite"]} '
+        '(recipe_id)')
+    cursor.execute(
+        'CREATE INDEX benchmark_cart_recipe ON '
+        f'{tables["shopping_cart"]} (recipe_id)')
+    for table in tables.values():
+        cursor.execute(f'ANALYZE {table}')
+
+
+def measure(function, runs):
+    function()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    percentiles = statistics.quantiles(samples, n=100)
+    return statistics.median(samples), percentiles[98]
+
+
+def report(title, scenarios, runs):
+    print(f'\n===== {title} =====')
+    for name, queryset in scenarios:
+        print(f'\n--- {name} ---')
+        print(queryset.explain(analyze=True, buffers=True))
+        p50, p99 = measure(lambda: list(queryset.all()), runs)
+        print(f'{name}: p50={p50:.2f} мс p99={p99:.2f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--recipes', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--tags', type=int, default=20)
+    parser.add_argument('--favorites', type=int, default=3_000_000)
+    parser.add_argument('--carts', type=int, default=1_000_000)
+    parser.add_argument('--runs', type=int, default=50)
+    options = parser.parse_args()
+
+    import django
+    django.setup()
+
+    from api.views import RecipeViewSet
+    from core.constants import POPULARITY_WINDOW_DAYS
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import AnonymousUser
+    from django.db import connection, transaction
+    from django.db.models import Count
+    from django.test import RequestFactory
+    from django.utils import timezone
+    from recipes.models import Favorite, Recipe, ShoppingCart, Tag
+    from rest_framework.request import Request
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Бенчмарк рассчитан на PostgreSQL: укажите DB_HOST и '
+                 'POSTGRES_* и запустите без DEBUG=True')
+
+    User = get_user_model()
+    tables = {
+        'user': User._meta.db_table,
+        'tag': Tag._meta.db_table,
+        'recipe': Recipe._meta.db_table,
+        'recipe_tags': Recipe.tags.through._meta.db_table,
+        'favorite': Favorite._meta.db_table,
+        'shopping_cart': ShoppingCart._meta.db_table,
+    }
+    factory = RequestFactory()
+
+    def get_page(params, user):
+        request = Request(factory.get('/api/recipes/', params))
+        request.user = user
+        view = RecipeViewSet(
+            request=request, format_kwarg=None, action='list', kwargs={})
+        queryset = view.filter_queryset(view.get_version_queryset())
+        return queryset.values(*view.version_fields)[:PAGE_SIZE]
+
+    def get_scenarios():
+        user = User.objects.filter(
+            username__startswith=BENCHMARK_PREFIX
+        ).annotate(
+            favorites_total=Count('favorite')
+        ).order_by('-favorites_total').first()
+        author_id = Recipe.objects.filter(
+            image=BENCHMARK_IMAGE
+        ).values_list('author_id', flat=True).first()
+        tags = list(Tag.objects.filter(
+            slug__startswith=BENCHMARK_PREFIX
+        ).values_list('slug', flat=True)[:2])
+        since = timezone.now() - timedelta(days=POPULARITY_WINDOW_DAYS)
+        return (
+            ('Лента, аноним', get_page({}, AnonymousUser())),
+            ('Лента, пользователь', get_page({}, user)),
+            ('Автор', get_page({'author': author_id}, user)),
+            ('Теги', get_page({'tags': tags}, user)),
+            ('Избранное', get_page({'is_favorited': 1}, user)),
+            ('Список покупок', get_page({'is_in_shopping_cart': 1}, user)),
+            ('Окно популярности', Favorite.objects.filter(
+                created_at__gte=since
+            ).values('recipe_id').annotate(total=Count('pk')).order_by()),
+        )
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                started = time.perf_counter()
+                seed(cursor, options, tables)
+                print(f'Данные засеяны за '
+                      f'{time.perf_counter() - started:.0f} с')
+                report('После 0006: составные индексы',
+                       get_scenarios(), options.runs)
+                use_legacy_indexes(cursor, tables)
+                report('До 0006: одиночные индексы внешних ключей',
+                       get_scenarios(), options.runs)
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()